@@ -1,6 +1,11 @@
+import functools
+import json
 import logging
 import os
-from typing import List, Optional
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 import requests
@@ -8,33 +13,109 @@ from requests import Session
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 TFL_BASE_URL = "https://api.tfl.gov.uk"
 _session: Optional[Session] = None
+_CREDENTIAL_PARAM_RE = re.compile(r"\b(app_id|app_key)=[^&\s)'\"]*")
+
+
+def _redact_credentials(exc: Exception) -> str:
+    """Exception text with TfL credential query values masked for logging."""
+    return _CREDENTIAL_PARAM_RE.sub(r"\1=***", str(exc))
+
+
+def _fetch_error(message: str, exc: Exception) -> RuntimeError:
+    """
+    RuntimeError carrying the redacted cause text. Raise it ``from None``: the
+    original exception's message holds the request URL, credentials included.
+    """
+    return RuntimeError(f"{message}: {_redact_credentials(exc)}")
+
+
+def _loads_json(content: bytes) -> Any:
+    """Parse a UTF-8 JSON body, bypassing requests' charset detection."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content.decode("utf-8"))
+
+
+class _JitteredRetry(Retry):
+    """Retry with full jitter so concurrent clients don't retry in lockstep."""
+
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super().get_backoff_time())
+
 
+@functools.lru_cache(maxsize=1)
+def _tfl_creds() -> Tuple[Optional[str], Optional[str]]:
+    """Read TFL_APP_ID / TFL_APP_KEY from the env once per process."""
+    return os.getenv("TFL_APP_ID"), os.getenv("TFL_APP_KEY")
 
-def _build_session(max_retries: int = 3, backoff_factor: float = 0.5) -> Session:
-    """Create a requests session with retry/backoff behaviour."""
+
+def _resolve_credentials(
+    app_id: Optional[str] = None,
+    app_key: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Return TfL credentials from args or env, raising if either is missing."""
+    env_app_id, env_app_key = _tfl_creds()
+    app_id = app_id or env_app_id
+    app_key = app_key or env_app_key
+    if not app_id or not app_key:
+        raise ValueError("Missing TfL credentials (TFL_APP_ID/TFL_APP_KEY).")
+    return app_id, app_key
+
+
+def _session_credentials(session: Session) -> Tuple[Optional[str], Optional[str]]:
+    params = session.params if isinstance(session.params, dict) else {}
+    return params.get("app_id"), params.get("app_key")
+
+
+def _build_session(
+    max_retries: int = 3,
+    backoff_factor: float = 0.5,
+    app_id: Optional[str] = None,
+    app_key: Optional[str] = None,
+) -> Session:
+    """
+    Create a requests session with retry/backoff behaviour.
+    When credentials are given they are attached as session-level query params.
+    """
     session = requests.Session()
-    retry = Retry(
+    retry = _JitteredRetry(
         total=max_retries,
         backoff_factor=backoff_factor,
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=["GET"],
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=32,
+        pool_maxsize=64,
+        pool_block=False,
+    )
     session.mount("http://", adapter)
     session.mount("https://", adapter)
+    if app_id and app_key:
+        session.params = {"app_id": app_id, "app_key": app_key}
     return session
 
 
 def get_http_session() -> Session:
-    """Return a module-level session, creating it on first use."""
+    """
+    Return a module-level session, creating it on first use.
+    TFL_APP_ID / TFL_APP_KEY are attached to the session if set in the env.
+    """
     global _session
     if _session is None:
-        _session = _build_session()
+        app_id, app_key = _tfl_creds()
+        _session = _build_session(app_id=app_id, app_key=app_key)
     return _session
 
 
@@ -47,30 +128,34 @@ def get_tfl_data(
 ) -> List[dict]:
     """
     Fetch arrivals for a TfL stop point.
-    Credentials sourced from args or env: TFL_APP_ID / TFL_APP_KEY.
+    Each credential is sourced from args, then the session's params, then env:
+    TFL_APP_ID / TFL_APP_KEY.
     """
-    app_id = app_id or os.getenv("TFL_APP_ID")
-    app_key = app_key or os.getenv("TFL_APP_KEY")
-    if not app_id or not app_key:
-        raise ValueError("Missing TfL credentials (TFL_APP_ID/TFL_APP_KEY).")
+    session = session or get_http_session()
+    session_app_id, session_app_key = _session_credentials(session)
+    params = None
+    if app_id or app_key or not (session_app_id and session_app_key):
+        app_id, app_key = _resolve_credentials(
+            app_id or session_app_id, app_key or session_app_key
+        )
+        params = {"app_id": app_id, "app_key": app_key}
 
     url = f"{TFL_BASE_URL}/stoppoint/{stop_point_id}/arrivals"
-    session = session or get_http_session()
     logger.info("Fetching TfL arrivals for stop %s", stop_point_id)
 
     try:
-        resp = session.get(
-            url,
-            params={"app_id": app_id, "app_key": app_key},
-            timeout=timeout,
-        )
+        resp = session.get(url, params=params, timeout=timeout)
         resp.raise_for_status()
     except requests.RequestException as exc:
-        logger.warning("TfL request failed for stop %s: %s", stop_point_id, exc)
-        raise RuntimeError("Failed to fetch data from TfL API") from exc
+        logger.warning(
+            "TfL request failed for stop %s: %s",
+            stop_point_id,
+            _redact_credentials(exc),
+        )
+        raise _fetch_error("Failed to fetch data from TfL API", exc) from None
 
     try:
-        data = resp.json()
+        data = _loads_json(resp.content)
     except ValueError as exc:
         logger.warning("TfL response was not JSON for stop %s", stop_point_id)
         raise RuntimeError("TfL API did not return JSON.") from exc
@@ -79,15 +164,63 @@ def get_tfl_data(
         logger.warning("Unexpected TfL response type %s", type(data).__name__)
         raise RuntimeError(f"Unexpected TfL response type: {type(data).__name__}")
 
-    logger.debug("Fetched %d arrival records for stop %s", len(data), stop_point_id)
+    logger.debug(
+        "Fetched %d arrival records for stop %s (content-encoding=%s)",
+        len(data),
+        stop_point_id,
+        resp.headers.get("Content-Encoding"),
+    )
     return data
 
 
+def get_tfl_data_many(
+    stop_point_ids: List[str],
+    max_workers: int = 16,
+    **kwargs,
+) -> Dict[str, List[dict]]:
+    """
+    Fetch arrivals for several stop points concurrently, keyed by stop point id
+    in first-seen order; duplicate ids are fetched once.
+    Keyword arguments are forwarded to get_tfl_data. The call is all-or-nothing:
+    if any stop fails, its RuntimeError is raised and no results are returned.
+    """
+    unique_ids = list(dict.fromkeys(stop_point_ids))
+    if not unique_ids:
+        return {}
+
+    # Resolve the shared session up front; get_http_session is not thread-safe.
+    if kwargs.get("session") is None:
+        kwargs["session"] = get_http_session()
+
+    workers = max(1, min(max_workers, len(unique_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda stop_point_id: get_tfl_data(stop_point_id, **kwargs),
+            unique_ids,
+        )
+        return dict(zip(unique_ids, results))
+
+
 def extract_tfl_data(stop_point_id: str, **kwargs) -> List[dict]:
     """Thin wrapper kept for backwards compatibility."""
     return get_tfl_data(stop_point_id, **kwargs)
 
 
+def _line_route_params(
+    line_ids: Optional[List[str]],
+    service_types: Optional[List[str]],
+    modes: Optional[List[str]],
+) -> Dict[str, str]:
+    params = {}
+    if line_ids:
+        params["ids"] = ",".join(line_ids)
+    if service_types:
+        params["serviceTypes"] = ",".join(service_types)
+    if modes:
+        params["modes"] = ",".join(modes)
+    return params
+
+
 def get_line_routes(
     line_ids: Optional[List[str]] = None,
     service_types: Optional[List[str]] = None,
@@ -97,41 +230,22 @@ def get_line_routes(
 ) -> List[dict]:
     """Fetch line route metadata from TfL."""
     url = f"{TFL_BASE_URL}/Line/Route"
-    params = {}
-    if line_ids:
-        params["ids"] = ",".join(line_ids)
-    if service_types:
-        params["serviceTypes"] = ",".join(service_types)
-    if modes:
-        params["modes"] = ",".join(modes)
+    params = _line_route_params(line_ids, service_types, modes)
 
     session = session or get_http_session()
-    logger.info(
-        "Fetching TfL line route metadata%s",
-        ", ".join(
-            filter(
-                None,
-                [
-                    f"for lines {params['ids']}" if "ids" in params else "",
-                    f"modes {params['modes']}" if "modes" in params else "",
-                    f"services {params['serviceTypes']}"
-                    if "serviceTypes" in params
-                    else "",
-                ],
-            )
-        )
-        or "",
-    )
+    logger.info("Fetching TfL line route metadata params=%s", params)
 
     try:
         resp = session.get(url, params=params, timeout=timeout)
         resp.raise_for_status()
     except requests.RequestException as exc:
-        logger.warning("TfL line route request failed: %s", exc)
-        raise RuntimeError("Failed to fetch line routes from TfL API") from exc
+        logger.warning(
+            "TfL line route request failed: %s", _redact_credentials(exc)
+        )
+        raise _fetch_error("Failed to fetch line routes from TfL API", exc) from None
 
     try:
-        data = resp.json()
+        data = _loads_json(resp.content)
     except ValueError as exc:
         logger.warning("TfL line route response was not JSON")
         raise RuntimeError("TfL API did not return JSON for line routes.") from exc
@@ -142,13 +256,133 @@ def get_line_routes(
             f"Unexpected TfL line route response type: {type(data).__name__}"
         )
 
-    logger.debug("Fetched %d line route records", len(data))
+    logger.debug(
+        "Fetched %d line route records (content-encoding=%s)",
+        len(data),
+        resp.headers.get("Content-Encoding"),
+    )
     return data
 
 
+def stream_line_routes(
+    line_ids: Optional[List[str]] = None,
+    service_types: Optional[List[str]] = None,
+    modes: Optional[List[str]] = None,
+    timeout: float = 10.0,
+    session: Optional[Session] = None,
+) -> requests.Response:
+    """
+    Open a streaming line route request without parsing the body.
+    The caller reads from resp.raw and is responsible for closing the response.
+    """
+    url = f"{TFL_BASE_URL}/Line/Route"
+    params = _line_route_params(line_ids, service_types, modes)
+
+    session = session or get_http_session()
+    logger.info("Streaming TfL line route metadata params=%s", params)
+
+    resp = None
+    try:
+        resp = session.get(url, params=params, timeout=timeout, stream=True)
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        # A streamed response holds its pooled connection until closed.
+        if resp is not None:
+            resp.close()
+        logger.warning(
+            "TfL line route request failed: %s", _redact_credentials(exc)
+        )
+        raise _fetch_error("Failed to fetch line routes from TfL API", exc) from None
+
+    # Let urllib3 undo any gzip/deflate transfer encoding as resp.raw is read.
+    resp.raw.decode_content = True
+    return resp
+
+
+def _flatten(
+    record: dict,
+    prefix: str = "",
+    out: Optional[dict] = None,
+    sep: str = ".",
+) -> dict:
+    """Flatten nested dicts into dot-separated keys, like pd.json_normalize."""
+    if out is None:
+        out = {}
+    for key, value in record.items():
+        new_key = f"{prefix}{sep}{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            _flatten(value, new_key, out, sep)
+        else:
+            out[new_key] = value
+    return out
+
+
+def _flatten_record(record: dict) -> dict:
+    """Flatten a record with top-level scalars first, matching json_normalize."""
+    out = {k: v for k, v in record.items() if not isinstance(v, dict)}
+    return _flatten({k: v for k, v in record.items() if isinstance(v, dict)}, out=out)
+
+
+def _leaf_paths(record: dict, prefix: Tuple[str, ...] = ()) -> List[Tuple[str, ...]]:
+    """Key paths to the non-dict leaves of a record, in depth-first order."""
+    paths = []
+    for key, value in record.items():
+        path = prefix + (key,)
+        if isinstance(value, dict):
+            paths.extend(_leaf_paths(value, path))
+        else:
+            paths.append(path)
+    return paths
+
+
+def _get_path(record: dict, path: Tuple[str, ...]) -> Any:
+    value: Any = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _uniform_columns(arrivals: List[dict]) -> Optional[Dict[str, list]]:
+    """
+    Column lists for arrivals that all share the first record's layout, in
+    _flatten_record's column order, or None if any record differs.
+    """
+    first = arrivals[0]
+    keys = first.keys()
+    if not all(a.keys() == keys for a in arrivals):
+        return None
+
+    columns = {}
+    nested = {}
+    for key, value in first.items():
+        values = [a[key] for a in arrivals]
+        if isinstance(value, dict):
+            nested[key] = values
+        elif dict in map(type, values):
+            return None
+        else:
+            columns[str(key)] = values
+
+    for key, values in nested.items():
+        paths = _leaf_paths(first[key])
+        if not all(type(v) is dict and _leaf_paths(v) == paths for v in values):
+            return None
+        for path in paths:
+            name = ".".join(str(part) for part in (key,) + path)
+            columns[name] = [_get_path(v, path) for v in values]
+    return columns
+
+
 def arrivals_to_dataframe(arrivals: List[dict]) -> pd.DataFrame:
     """Optional: normalize arrivals to a DataFrame."""
     if not arrivals:
         return pd.DataFrame()
-    return pd.json_normalize(arrivals)
 
+    # TfL arrivals normally share one schema, so build columns directly and
+    # only fall back to per-row flattening when any record disagrees.
+    columns = _uniform_columns(arrivals)
+    if columns is None:
+        return pd.DataFrame([_flatten_record(a) for a in arrivals])
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(arrivals)))
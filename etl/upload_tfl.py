@@ -5,15 +5,56 @@ import io
 import json
 import logging
 import os
-from datetime import datetime
-from typing import List, Optional
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from urllib3 import exceptions as urllib3_exceptions
 
-from .extract_tfl import get_line_routes
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+from .extract_tfl import (
+    _fetch_error,
+    _redact_credentials,
+    get_line_routes,
+    stream_line_routes,
+)
 
 logger = logging.getLogger(__name__)
 
+_COPY_BUFFER_SIZE = 64 * 1024
+_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=_MULTIPART_THRESHOLD,
+    multipart_chunksize=_MULTIPART_THRESHOLD,
+    max_concurrency=8,
+)
+
+_s3_clients: Dict[Optional[str], Any] = {}
+
+
+def _dumps_json(payload: Any) -> bytes:
+    """Serialize a payload to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _get_s3_client(region: Optional[str]):
+    """Return a cached S3 client for the region, creating it on first use."""
+    client = _s3_clients.get(region)
+    if client is None:
+        session = boto3.session.Session(region_name=region)
+        client = session.client("s3")
+        _s3_clients[region] = client
+    return client
+
 
 def _resolve_s3_config(
     bucket: Optional[str],
@@ -30,6 +71,22 @@ def _resolve_s3_config(
     return bucket_name, prefix, region
 
 
+def _snapshot_timestamp() -> str:
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+
+
+def _build_object_key(
+    prefix: str,
+    compress: bool,
+    timestamp: Optional[str] = None,
+) -> str:
+    timestamp = timestamp or _snapshot_timestamp()
+    filename = f"line-routes-{timestamp}.json"
+    if compress:
+        filename += ".gz"
+    return f"{prefix.rstrip('/')}/{filename}" if prefix else filename
+
+
 def upload_line_routes_to_s3(
     bucket: Optional[str] = None,
     key_prefix: Optional[str] = None,
@@ -38,36 +95,92 @@ def upload_line_routes_to_s3(
     modes: Optional[List[str]] = None,
     compress: bool = True,
     aws_region: Optional[str] = None,
+    routes: Optional[List[dict]] = None,
+    timestamp: Optional[str] = None,
 ) -> str:
-    """Fetch line routes and upload the payload to S3, returning the object key."""
+    """
+    Fetch line routes and upload the payload to S3, returning the object key.
+    Pass a pre-fetched ``routes`` list to upload the same snapshot more than once
+    without re-fetching it from TfL, and a shared ``timestamp`` (%Y%m%dT%H%M%SZ)
+    to give those uploads the same object name.
+    """
 
     bucket_name, prefix, region = _resolve_s3_config(bucket, key_prefix, aws_region)
 
-    routes = get_line_routes(
-        line_ids=line_ids,
-        service_types=service_types,
-        modes=modes,
+    if routes is None:
+        routes = get_line_routes(
+            line_ids=line_ids,
+            service_types=service_types,
+            modes=modes,
+        )
+
+    object_key = _build_object_key(prefix, compress, timestamp)
+    payload = _dumps_json(routes)
+    data_bytes = gzip.compress(payload, compresslevel=6) if compress else payload
+
+    # TransferConfig switches to multipart above the threshold, and both sizes
+    # surface failures as S3UploadFailedError.
+    s3_client = _get_s3_client(region)
+    s3_client.upload_fileobj(
+        io.BytesIO(data_bytes),
+        bucket_name,
+        object_key,
+        Config=_TRANSFER_CONFIG,
     )
 
-    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    filename = f"line-routes-{timestamp}.json"
-    data_bytes: bytes
+    logger.info("Uploaded line route payload to s3://%s/%s", bucket_name, object_key)
+    return object_key
 
-    if compress:
-        filename += ".gz"
-        buffer = io.BytesIO()
-        with gzip.GzipFile(filename=filename, mode="wb", fileobj=buffer) as gz:
-            gz.write(json.dumps(routes, ensure_ascii=False).encode("utf-8"))
-        data_bytes = buffer.getvalue()
-    else:
-        data_bytes = json.dumps(routes, ensure_ascii=False).encode("utf-8")
 
-    object_key = f"{prefix.rstrip('/')}/{filename}" if prefix else filename
+def stream_line_routes_to_s3(
+    bucket: Optional[str] = None,
+    key_prefix: Optional[str] = None,
+    line_ids: Optional[List[str]] = None,
+    service_types: Optional[List[str]] = None,
+    modes: Optional[List[str]] = None,
+    compress: bool = True,
+    aws_region: Optional[str] = None,
+    timestamp: Optional[str] = None,
+) -> str:
+    """
+    Archive the raw line route response to S3 without parsing it, returning the
+    object key. Peak memory is bounded by the copy buffer rather than payload size.
+    """
 
-    session = boto3.session.Session(region_name=region)
-    s3_client = session.client("s3")
-    s3_client.put_object(Bucket=bucket_name, Key=object_key, Body=data_bytes)
+    bucket_name, prefix, region = _resolve_s3_config(bucket, key_prefix, aws_region)
+    object_key = _build_object_key(prefix, compress, timestamp)
 
-    logger.info("Uploaded line route payload to s3://%s/%s", bucket_name, object_key)
-    return object_key
+    resp = stream_line_routes(
+        line_ids=line_ids,
+        service_types=service_types,
+        modes=modes,
+    )
 
+    with resp, tempfile.TemporaryFile() as upload_stream:
+        try:
+            if compress:
+                with gzip.GzipFile(
+                    mode="wb", fileobj=upload_stream, compresslevel=6
+                ) as gz:
+                    shutil.copyfileobj(resp.raw, gz, _COPY_BUFFER_SIZE)
+            else:
+                shutil.copyfileobj(resp.raw, upload_stream, _COPY_BUFFER_SIZE)
+        except urllib3_exceptions.HTTPError as exc:
+            logger.warning(
+                "TfL line route stream failed: %s", _redact_credentials(exc)
+            )
+            raise _fetch_error(
+                "Failed to fetch line routes from TfL API", exc
+            ) from None
+        upload_stream.seek(0)
+
+        s3_client = _get_s3_client(region)
+        s3_client.upload_fileobj(
+            upload_stream,
+            bucket_name,
+            object_key,
+            Config=_TRANSFER_CONFIG,
+        )
+
+    logger.info("Streamed line route payload to s3://%s/%s", bucket_name, object_key)
+    return object_key
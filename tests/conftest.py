@@ -0,0 +1,49 @@
+import io
+import threading
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+class StubAdapter(BaseAdapter):
+    """Transport adapter that records request URLs and returns canned responses."""
+
+    def __init__(self, status=200, body=b"[]", raw=None):
+        super().__init__()
+        self.status = status
+        self.body = body
+        self.raw = raw
+        self.urls = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.urls.append(request.url)
+        resp = requests.Response()
+        resp.status_code = self.status
+        resp.url = request.url
+        resp.request = request
+        resp.headers = CaseInsensitiveDict()
+        resp.raw = self.raw if self.raw is not None else io.BytesIO(self.body)
+        return resp
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stub_session():
+    """Factory for a requests session whose HTTP(S) traffic goes to a StubAdapter."""
+
+    def make(params=None, **adapter_kwargs):
+        session = requests.Session()
+        adapter = StubAdapter(**adapter_kwargs)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if params:
+            session.params = params
+        return session, adapter
+
+    return make
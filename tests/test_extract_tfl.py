@@ -0,0 +1,226 @@
+import traceback
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+import pytest
+import requests
+
+from etl import extract_tfl
+from etl.extract_tfl import arrivals_to_dataframe, get_tfl_data_many
+
+
+def _arrival(i: int) -> dict:
+    return {
+        "id": str(i),
+        "lineId": "central",
+        "timing": {"countdownServerAdjustment": "00:00:00", "source": {"id": i}},
+        "timeToStation": i * 30,
+        "platformName": None,
+        "tags": ["a", "b"],
+    }
+
+
+def _uniform(n: int = 10) -> list:
+    return [_arrival(i) for i in range(n)]
+
+
+def _with_extra_key_late() -> list:
+    arrivals = _uniform()
+    arrivals.append({**_arrival(10), "extra": 1})
+    return arrivals
+
+
+def _with_null_timing_late() -> list:
+    arrivals = _uniform()
+    arrivals.append({**_arrival(10), "timing": None})
+    return arrivals
+
+
+def _with_dict_timing_late() -> list:
+    arrivals = [{**_arrival(i), "timing": None} for i in range(10)]
+    arrivals.append(_arrival(10))
+    return arrivals
+
+
+def _with_nested_key_late() -> list:
+    arrivals = _uniform()
+    late = _arrival(10)
+    late["timing"]["read"] = "2026-01-01"
+    arrivals.append(late)
+    return arrivals
+
+
+def _with_missing_key_late() -> list:
+    arrivals = _uniform()
+    late = _arrival(10)
+    del late["platformName"]
+    arrivals.append(late)
+    return arrivals
+
+
+@pytest.mark.parametrize(
+    "arrivals",
+    [
+        _uniform(),
+        _uniform(1),
+        _with_extra_key_late(),
+        _with_null_timing_late(),
+        _with_dict_timing_late(),
+        _with_nested_key_late(),
+        _with_missing_key_late(),
+        [{"id": "1", "timing": {}}, {"id": "2", "timing": {"read": "x"}}],
+    ],
+    ids=[
+        "uniform",
+        "single",
+        "extra-key-late",
+        "null-timing-late",
+        "dict-timing-late",
+        "nested-key-late",
+        "missing-key-late",
+        "empty-nested",
+    ],
+)
+def test_arrivals_to_dataframe_matches_json_normalize(arrivals):
+    pd.testing.assert_frame_equal(
+        arrivals_to_dataframe(arrivals), pd.json_normalize(arrivals)
+    )
+
+
+def test_arrivals_to_dataframe_empty():
+    assert arrivals_to_dataframe([]).empty
+
+
+def test_get_tfl_data_many_dedupes_and_keeps_order(stub_session):
+    session, adapter = stub_session(
+        params={"app_id": "ID1", "app_key": "KEY1"}, body=b'[{"id": "x"}]'
+    )
+
+    result = get_tfl_data_many(["b", "a", "b", "c", "a"], session=session)
+
+    assert list(result) == ["b", "a", "c"]
+    assert all(records == [{"id": "x"}] for records in result.values())
+    assert len(adapter.urls) == 3
+
+
+def test_get_tfl_data_many_shares_one_session(stub_session, monkeypatch):
+    session, adapter = stub_session(params={"app_id": "ID1", "app_key": "KEY1"})
+    calls = []
+
+    def fake_get_http_session():
+        calls.append(1)
+        return session
+
+    monkeypatch.setattr(extract_tfl, "get_http_session", fake_get_http_session)
+
+    result = get_tfl_data_many([str(i) for i in range(20)], max_workers=8)
+
+    assert len(result) == 20
+    assert len(calls) == 1
+    assert len(adapter.urls) == 20
+
+
+def test_get_tfl_data_many_is_all_or_nothing(stub_session):
+    session, _ = stub_session(params={"app_id": "ID1", "app_key": "KEY1"}, status=500)
+
+    with pytest.raises(RuntimeError):
+        get_tfl_data_many(["a", "b"], session=session)
+
+
+@pytest.mark.parametrize(
+    "fetch",
+    [
+        lambda session: extract_tfl.get_tfl_data("940GZZLUOXC", session=session),
+        lambda session: extract_tfl.get_line_routes(session=session),
+        lambda session: extract_tfl.stream_line_routes(session=session),
+    ],
+    ids=["arrivals", "line-routes", "stream-line-routes"],
+)
+def test_fetch_errors_do_not_leak_credentials(fetch, stub_session, caplog):
+    session, adapter = stub_session(
+        params={"app_id": "ID1", "app_key": "SECRETKEY"}, status=401
+    )
+
+    with pytest.raises(RuntimeError) as excinfo:
+        fetch(session)
+
+    assert "SECRETKEY" in adapter.urls[0]
+    traceback_text = "".join(traceback.format_exception(excinfo.value))
+    assert "401" in traceback_text
+    assert "app_key=***" in traceback_text
+    assert "SECRETKEY" not in traceback_text
+    assert "SECRETKEY" not in caplog.text
+
+
+@pytest.fixture
+def env_creds(monkeypatch):
+    def set_creds(app_id=None, app_key=None):
+        monkeypatch.setattr(extract_tfl, "_tfl_creds", lambda: (app_id, app_key))
+
+    set_creds()
+    return set_creds
+
+
+def _query(url: str) -> dict:
+    return dict(parse_qsl(urlsplit(url).query))
+
+
+def test_get_tfl_data_uses_session_credentials(stub_session, env_creds):
+    session, adapter = stub_session(params={"app_id": "ID1", "app_key": "KEY1"})
+
+    extract_tfl.get_tfl_data("stop", session=session)
+
+    assert _query(adapter.urls[0]) == {"app_id": "ID1", "app_key": "KEY1"}
+
+
+def test_get_tfl_data_explicit_credentials_override_session(stub_session, env_creds):
+    session, adapter = stub_session(params={"app_id": "ID1", "app_key": "KEY1"})
+
+    extract_tfl.get_tfl_data("stop", app_id="ID2", app_key="KEY2", session=session)
+
+    assert _query(adapter.urls[0]) == {"app_id": "ID2", "app_key": "KEY2"}
+
+
+def test_get_tfl_data_partial_override_keeps_session_key(stub_session, env_creds):
+    session, adapter = stub_session(params={"app_id": "ID1", "app_key": "KEY1"})
+
+    extract_tfl.get_tfl_data("stop", app_id="ID2", session=session)
+
+    assert _query(adapter.urls[0]) == {"app_id": "ID2", "app_key": "KEY1"}
+
+
+def test_get_tfl_data_credentialless_session_falls_back_to_env(
+    stub_session, env_creds
+):
+    session, adapter = stub_session()
+    env_creds("ENV_ID", "ENV_KEY")
+
+    extract_tfl.get_tfl_data("stop", session=session)
+
+    assert _query(adapter.urls[0]) == {"app_id": "ENV_ID", "app_key": "ENV_KEY"}
+
+
+def test_get_tfl_data_without_any_credentials_raises(stub_session, env_creds):
+    session, adapter = stub_session()
+
+    with pytest.raises(ValueError):
+        extract_tfl.get_tfl_data("stop", session=session)
+    assert adapter.urls == []
+
+
+def test_redact_credentials_masks_http_error_message(stub_session):
+    session, _ = stub_session(
+        params={"app_id": "ID1", "app_key": "SECRETKEY"}, status=401
+    )
+    resp = session.get("https://api.tfl.gov.uk/Line/Route", params={"modes": "tube"})
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        resp.raise_for_status()
+
+    assert "SECRETKEY" in str(excinfo.value)
+    redacted = extract_tfl._redact_credentials(excinfo.value)
+    assert "app_id=***" in redacted
+    assert "app_key=***" in redacted
+    assert "modes=tube" in redacted
+    assert "ID1" not in redacted
+    assert "SECRETKEY" not in redacted
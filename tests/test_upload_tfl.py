@@ -0,0 +1,117 @@
+import gzip
+import io
+
+import pytest
+from urllib3.exceptions import ProtocolError
+
+from etl import extract_tfl, upload_tfl
+
+ROUTES_BODY = b'[{"id": "central", "name": "Central"}]'
+
+
+class StubS3Client:
+    def __init__(self):
+        self.uploads = []
+
+    def upload_fileobj(self, fileobj, bucket, key, Config=None):
+        self.uploads.append((bucket, key, fileobj.read(), Config))
+
+
+class BrokenRaw(io.RawIOBase):
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        raise ProtocolError(
+            "Connection broken for /Line/Route?app_id=ID1&app_key=KEY1"
+        )
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    client = StubS3Client()
+    monkeypatch.setattr(upload_tfl, "_get_s3_client", lambda region: client)
+    return client
+
+
+@pytest.fixture
+def tfl_session(stub_session, monkeypatch):
+    def install(**adapter_kwargs):
+        session, adapter = stub_session(
+            params={"app_id": "ID1", "app_key": "KEY1"}, **adapter_kwargs
+        )
+        monkeypatch.setattr(extract_tfl, "_session", session)
+        return adapter
+
+    return install
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_stream_line_routes_to_s3_uploads_body(compress, tfl_session, s3_client):
+    tfl_session(body=ROUTES_BODY)
+
+    key = upload_tfl.stream_line_routes_to_s3(
+        bucket="bucket",
+        key_prefix="line-routes/",
+        compress=compress,
+        timestamp="20260101T000000Z",
+    )
+
+    suffix = ".json.gz" if compress else ".json"
+    assert key == f"line-routes/line-routes-20260101T000000Z{suffix}"
+    [(bucket, uploaded_key, data, config)] = s3_client.uploads
+    assert (bucket, uploaded_key) == ("bucket", key)
+    assert (gzip.decompress(data) if compress else data) == ROUTES_BODY
+    assert config is upload_tfl._TRANSFER_CONFIG
+
+
+def test_stream_line_routes_to_s3_closes_response_on_read_error(
+    tfl_session, s3_client, caplog
+):
+    raw = BrokenRaw()
+    tfl_session(raw=raw)
+
+    with pytest.raises(RuntimeError, match="Connection broken") as excinfo:
+        upload_tfl.stream_line_routes_to_s3(bucket="bucket")
+
+    assert "KEY1" not in str(excinfo.value)
+    assert "KEY1" not in caplog.text
+    assert excinfo.value.__cause__ is None
+    assert raw.closed
+    assert s3_client.uploads == []
+
+
+def test_stream_line_routes_to_s3_closes_response_on_http_error(
+    tfl_session, s3_client
+):
+    raw = io.BytesIO(b"Unauthorized")
+    tfl_session(status=401, raw=raw)
+
+    with pytest.raises(RuntimeError, match="401"):
+        upload_tfl.stream_line_routes_to_s3(bucket="bucket")
+
+    assert raw.closed
+    assert s3_client.uploads == []
+
+
+@pytest.mark.parametrize(
+    "routes",
+    [
+        [{"id": "central"}],
+        [{"id": str(i), "name": "x" * 1024} for i in range(9 * 1024)],
+    ],
+    ids=["below-threshold", "above-threshold"],
+)
+def test_upload_line_routes_to_s3_always_uses_transfer_manager(routes, s3_client):
+    key = upload_tfl.upload_line_routes_to_s3(
+        bucket="bucket",
+        compress=False,
+        routes=routes,
+        timestamp="20260101T000000Z",
+    )
+
+    [(bucket, uploaded_key, data, config)] = s3_client.uploads
+    assert (bucket, uploaded_key) == ("bucket", key)
+    assert data == upload_tfl._dumps_json(routes)
+    assert (len(data) > upload_tfl._MULTIPART_THRESHOLD) == (len(routes) > 1)
+    assert config is upload_tfl._TRANSFER_CONFIG